@@ -0,0 +1,115 @@
+from model import Bitboard
+
+import numpy as np
+
+'''
+Vectorized hand evaluation over arrays of 52-bit card masks
+'''
+
+# lookup tables over every 13-bit rank mask, see Bitboard
+POPCOUNT = np.array(Bitboard.POPCOUNT, dtype=np.int64)
+STRAIGHTS = np.array(Bitboard.STRAIGHTS, dtype=np.int64)
+TOP5 = np.array(Bitboard.TOP5, dtype=np.int64)
+RANK_KEYS = np.array([Bitboard.RANK_KEYS[ranks] for ranks in Bitboard.TOP5], dtype=np.int64) # keys of the top 5 ranks
+TOP_RANK = np.array([ranks.bit_length() for ranks in range(1 << 13)], dtype=np.int64)
+
+BIT_WEIGHTS = np.left_shift(np.uint64(1), np.arange(52, dtype=np.uint64))
+
+
+def to_masks(hands):
+  '''
+  Card masks as a uint64 array, from a uint64 array or an N x 52 boolean
+  matrix with a column per card code
+  '''
+  hands = np.asarray(hands)
+  if hands.ndim == 2:
+    if hands.shape[1] != 52:
+      raise ValueError('expected 52 card columns, got ' + str(hands.shape[1]))
+    return (hands.astype(np.uint64) * BIT_WEIGHTS).sum(axis=1, dtype=np.uint64)
+  return hands.astype(np.uint64)
+
+
+def to_matrix(masks):
+  '''
+  N x 52 boolean matrix of card masks
+  '''
+  masks = to_masks(masks)
+  return (masks[:, None] & BIT_WEIGHTS) != 0
+
+
+def strength_batch(hands):
+  '''
+  HandScoring.strength of every hand, as an int64 array
+  '''
+  masks = to_masks(hands)
+  rank_mask = np.uint64(Bitboard.RANK_MASK)
+  suits = np.stack([
+    ((masks >> np.uint64(shift)) & rank_mask).astype(np.int64) for shift in (0, 13, 26, 39)
+  ])
+  a, b, c, d = suits
+
+  # ranks held at least once, twice, three and four times
+  ranks = a | b | c | d
+  twice = (a & (b | c | d)) | (b & (c | d)) | (c & d)
+  thrice = (a & b & (c | d)) | (c & d & (a | b))
+  fours = a & b & c & d
+  threes = thrice & ~fours
+  pairs = twice & ~thrice
+
+  # straight flushes, and the flush suit with the highest card (ties go
+  # to the higher suit, as in HandScoring.strength_mask)
+  flush_suits = POPCOUNT[suits] >= 5
+  straight_flush_top = np.where(flush_suits, STRAIGHTS[suits], 0).max(axis=0)
+  flush_order = np.where(flush_suits, TOP_RANK[suits] * 4 + np.arange(4)[:, None], -1)
+  flush_suit = np.take_along_axis(suits, flush_order.argmax(axis=0)[None, :], axis=0)[0]
+  has_flush = flush_suits.any(axis=0)
+
+  top_three = TOP_RANK[threes]
+  full_house_pair = TOP_RANK[(threes | pairs) & ~(1 << np.maximum(top_three - 1, 0))]
+  top_pair = TOP_RANK[pairs]
+  second_pair = TOP_RANK[pairs & ~(1 << np.maximum(top_pair - 1, 0))]
+  straight_top = STRAIGHTS[ranks]
+
+  return np.select(
+    [
+      masks == 0,
+      straight_flush_top > 0,
+      fours > 0,
+      (threes > 0) & (full_house_pair > 0),
+      has_flush,
+      straight_top > 0,
+      threes > 0,
+      second_pair > 0,
+      pairs > 0
+    ],
+    [
+      0,
+      9 << 20 | straight_flush_top,
+      8 << 20 | TOP_RANK[fours],
+      7 << 20 | top_three << 4 | full_house_pair,
+      6 << 20 | RANK_KEYS[flush_suit],
+      5 << 20 | straight_top,
+      4 << 20 | top_three,
+      3 << 20 | top_pair << 4 | second_pair,
+      2 << 20 | top_pair
+    ],
+    1 << 20 | TOP_RANK[ranks]
+  )
+
+
+def score_batch(hands):
+  '''
+  Hand rank values (HandScoring.HandRanks, 0 for an empty hand) and
+  strengths of every hand
+  '''
+  strengths = strength_batch(hands)
+  categories = np.where(strengths > 0, 10 - (strengths >> 20), 0).astype(np.int8)
+  return categories, strengths
+
+
+def compare_batch(player_masks, dealer_masks):
+  '''
+  HandScoring.compare_hands for every pair of hands: 1 where the player
+  wins, -1 where the dealer wins and 0 on a tie
+  '''
+  return np.sign(strength_batch(player_masks) - strength_batch(dealer_masks)).astype(np.int8)
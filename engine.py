@@ -0,0 +1,107 @@
+from model import Model, Deck, Hand, HandScoring
+
+from enum import Enum
+
+class Engine:
+  '''
+  Renj poker rules on a Model, without input, output or delays
+  '''
+  class Outcome(Enum):
+    WIN = 1
+    LOSE = 2
+    DECK_EMPTY = 3 # player got less than 5 cards from the entire deck
+
+  def __init__(self, model=None):
+    if model is None:
+      model = Engine.new_model()
+    self.model = model
+    self.outcome = None # Outcome once the game is over
+    self.rounds = 0 # number of filters played
+
+  def new_model(deck=None, player_cards=(), dealer_cards=()):
+    '''
+    Model for a game with a shuffled deck, optionally continuing from
+    cards already in the player's and dealer's hands
+    '''
+    model = Model()
+    model.deck = deck if deck is not None else Deck()
+    model.player_hand = Hand()
+    model.dealer_hand = Hand()
+    for card in player_cards:
+      model.player_hand.add_card(card)
+    for card in dealer_cards:
+      model.dealer_hand.add_card(card)
+    model.drawn_cards = []
+    return model
+
+  def play(self, choose_filter, on_draw=None):
+    '''
+    Play until the game is over and return the outcome. choose_filter is
+    called with the model before each round and returns the set of cards
+    to filter to the player; on_draw is called with the model after each
+    drawn card.
+    '''
+    while self.outcome is None:
+      self.start_round(choose_filter(self.model))
+      for _ in self.draws():
+        if on_draw is not None:
+          on_draw(self.model)
+    return self.outcome
+
+  def start_round(self, filter):
+    '''
+    Start drawing with the given set of cards as the filter
+    '''
+    self.model.filter = filter
+    self.model.drawn_cards = []
+    self.model.state = Model.GameMode.DRAWING
+    self.rounds += 1
+
+  def draws(self):
+    '''
+    Draw the cards of the current round one at a time, yielding each one.
+    Cards go to the dealer until one matches the filter. If that gives the
+    player 5 cards, the dealer is filled up to 8 cards and the game is
+    decided.
+    '''
+    model = self.model
+    deck = model.deck
+    filter = model.filter
+
+    done = False
+    while not done:
+      card = deck.draw()
+      model.drawn_cards.append(card)
+
+      # give it to player or dealer
+      if card in filter:
+        model.player_hand.add_card(card)
+        done = True # player got card, stop drawing
+      else:
+        model.dealer_hand.add_card(card)
+      if len(deck.cards) == 0:
+        done = True
+      yield card
+
+    # check if game over
+    if model.player_hand.size() >= 5:
+
+      # draw until dealer has at least 8 cards
+      if model.dealer_hand.size() < 8:
+        model.state = Model.GameMode.FINISHING
+        while model.dealer_hand.size() < 8:
+          card = deck.draw()
+          model.drawn_cards.append(card)
+          model.dealer_hand.add_card(card)
+          yield card
+
+      won = HandScoring.compare_hands(model.player_hand.hand, model.dealer_hand.hand) == 1
+      self.finish(Engine.Outcome.WIN if won else Engine.Outcome.LOSE)
+
+    # alternate end condition: player got less than 5 cards from entire deck
+    elif len(deck.cards) == 0:
+      self.finish(Engine.Outcome.DECK_EMPTY)
+
+  def finish(self, outcome):
+    self.outcome = outcome
+    self.model.message = 'YOU WIN' if outcome == Engine.Outcome.WIN else 'YOU LOSE'
@@ -1,4 +1,4 @@
-from collections import deque, Counter
+from collections import deque
 import random
 from enum import Enum
 from functools import total_ordering
@@ -77,7 +77,10 @@ class HandScoring:
     TWO_PAIR = 7
     ONE_PAIR = 8
     HIGH_CARD = 9
-    
+
+  # hand rank for the top bits of a strength, weakest first
+  RANKS_BY_STRENGTH = [None] + sorted(HandRanks, key=lambda hand_rank: -hand_rank.value)
+
   def score(hand):
     '''
     Return the name and set of relevant cards for the best poker hand.
@@ -86,191 +89,153 @@ class HandScoring:
     '''
     if len(hand) == 0:
       return None
+    return HandScoring.score_mask(Bitboard.mask(hand))
 
-    hands = HandScoring.HandRanks
+  def score_mask(mask):
+    '''
+    Same as score, for a hand given as a 52-bit card mask
+    '''
+    if mask == 0:
+      return None
+    strength = HandScoring.strength_mask(mask)
+    cards = HandScoring.relevant_cards(mask, strength)
+    return (HandScoring.hand_rank(strength), Bitboard.cards(cards))
 
-    def get_counts(hand):
-      '''
-      Get number of each rank and suit in the hand
-      '''
-      rank_counts = Counter([card.rank for card in hand])
-      suit_counts = Counter([card.suit for card in hand])
-      return rank_counts, suit_counts    
+  def strength(hand):
+    '''
+    Integer that orders hands like Renj poker: hand rank first, then the
+    ranks of the relevant cards. Suits are ignored, so equal ranks give
+    equal strengths. An empty hand is 0.
+    '''
+    if len(hand) == 0:
+      return 0
+    return HandScoring.strength_mask(Bitboard.mask(hand))
 
+  def hand_rank(strength):
     '''
-    Each of these detects the specified hand in some subset of the cards
+    Hand rank encoded in a nonzero strength
     '''
+    return HandScoring.RANKS_BY_STRENGTH[strength >> 20]
+
+  def strength_mask(mask):
+    '''
+    Strength of a nonempty card mask. The hand rank is found with a few bit
+    operations on the four 13-bit suit masks instead of counting cards,
+    and sits above 20 bits of tie-break ranks, one per 4-bit digit.
+    '''
+    rank_mask = Bitboard.RANK_MASK
+    suits = (mask & rank_mask, (mask >> 13) & rank_mask, (mask >> 26) & rank_mask, mask >> 39)
+    a, b, c, d = suits
+
+    # ranks held at least once, twice, three and four times
+    ranks = a | b | c | d
+    twice = (a & (b | c | d)) | (b & (c | d)) | (c & d)
+    thrice = (a & b & (c | d)) | (c & d & (a | b))
+    fours = a & b & c & d
+    threes = thrice & ~fours
+    pairs = twice & ~thrice
+
+    # highest straight flush, and the flush suit with the highest card
+    # (ties go to the higher suit, like the highest card in sort order)
+    straight_flush_top = 0
+    flush_top = 0
+    flush_suit = 0
+    popcount = Bitboard.POPCOUNT
+    for suit in suits:
+      if popcount[suit] >= 5:
+        top = Bitboard.STRAIGHTS[suit]
+        if top > straight_flush_top:
+          straight_flush_top = top
+        if suit.bit_length() >= flush_top:
+          flush_top = suit.bit_length()
+          flush_suit = suit
+
+    if straight_flush_top:
+      return 9 << 20 | straight_flush_top
+
+    if fours:
+      return 8 << 20 | fours.bit_length()
+
+    if threes:
+      top = 1 << (threes.bit_length() - 1)
+      rest = (threes | pairs) & ~top
+      if rest:
+        # best remaining rank makes the pair
+        return 7 << 20 | top.bit_length() << 4 | rest.bit_length()
+
+    if flush_top:
+      return 6 << 20 | Bitboard.RANK_KEYS[Bitboard.TOP5[flush_suit]]
+
+    top = Bitboard.STRAIGHTS[ranks]
+    if top:
+      return 5 << 20 | top
+
+    if threes:
+      return 4 << 20 | threes.bit_length()
+
+    if pairs:
+      top = 1 << (pairs.bit_length() - 1)
+      rest = pairs & ~top
+      if rest:
+        return 3 << 20 | top.bit_length() << 4 | rest.bit_length()
+      return 2 << 20 | top.bit_length()
+
+    return 1 << 20 | ranks.bit_length()
+
+  def relevant_cards(mask, strength):
+    '''
+    Mask of the cards in mask that make up the hand of the given strength
+    '''
+    hands = HandScoring.HandRanks
+    hand_rank = HandScoring.hand_rank(strength)
+    key = strength & 0xFFFFF
+    spread = Bitboard.SUIT_SPREAD
+    rank_mask = Bitboard.RANK_MASK
+
+    def rank_cards(rank):
+      return mask & (1 << (rank - 1)) * spread
+
+    if hand_rank == hands.STRAIGHT_FLUSH:
+      # highest suit holding the straight, like the flush below
+      straight = Bitboard.straight_ranks(key)
+      for shift in (39, 26, 13, 0):
+        if (mask >> shift) & straight == straight:
+          return straight << shift
+
+    elif hand_rank == hands.FLUSH:
+      for shift in (39, 26, 13, 0):
+        suit = (mask >> shift) & rank_mask
+        if Bitboard.POPCOUNT[suit] >= 5 and Bitboard.RANK_KEYS[Bitboard.TOP5[suit]] == key:
+          return Bitboard.TOP5[suit] << shift
+
+    elif hand_rank == hands.FULL_HOUSE:
+      # pair from the lowest two suits of its rank
+      pair_cards = rank_cards(key & 0xF)
+      if Bitboard.popcount(pair_cards) == 3:
+        pair_cards ^= 1 << (pair_cards.bit_length() - 1)
+      return rank_cards(key >> 4) | pair_cards
+
+    elif hand_rank == hands.STRAIGHT:
+      # one card of each rank, lowest suit first
+      cards = 0
+      for rank in range(key - 4, key + 1):
+        cards_of_rank = rank_cards(rank)
+        cards |= cards_of_rank & -cards_of_rank
+      return cards
+
+    elif hand_rank == hands.TWO_PAIR:
+      return rank_cards(key >> 4) | rank_cards(key & 0xF)
+
+    # four, three or one of a kind and high card
+    return rank_cards(key)
 
-    def four_kind(hand):
-      rank_counts, _ = get_counts(hand)
-      ranks = sorted([rank for rank, count in rank_counts.most_common() if count == 4])
-      if len(ranks) > 0:
-        # choose best available 4 of kind by rank
-        cards = set([card for card in hand if card.rank == ranks[-1]])
-        return (hands.FOUR_KIND, cards)
-      return (hands.FOUR_KIND, None)
-
-    def fullhouse(hand):
-      rank_counts, _ = get_counts(hand)
-      ranks_3 = sorted([rank for rank, count in rank_counts.most_common() if count == 3])
-      ranks_2 = sorted([rank for rank, count in rank_counts.most_common() if count == 2 or count == 3])
-
-      if len(ranks_3) > 0:
-        # choose best rank for 3-of-kind
-        best_rank_3 = ranks_3[-1]
-        ranks_2.remove(best_rank_3)
-
-        # choose best remaining rank for pair
-        if len(ranks_2) > 0:
-          best_rank_2 = ranks_2[-1]
-          cards = set([card for card in hand if card.rank == best_rank_3])
-          for card in hand:
-            if card.rank == best_rank_2:
-              cards.add(card)
-              if len(cards) == 5:
-                break
-          return (hands.FULL_HOUSE, cards)
-
-      return (hands.FULL_HOUSE, None)
-
-    def flush(hand):
-      _, suit_counts = get_counts(hand)
-      suits = [suit for suit, count in suit_counts.most_common() if count >= 5]
-      if len(suits) > 0:
-        all_flush_cards = sorted([card for card in hand if card.suit in suits])
-
-        # choose best ranked flush
-        top_ranked_suit = all_flush_cards[-1].suit
-        cards = sorted([card for card in all_flush_cards if card.suit == top_ranked_suit], reverse=True)[:5]
-        return (hands.FLUSH, set(cards))
-      return (hands.FLUSH, None)
-
-    def straight(hand):
-      rank_counts, _ = get_counts(hand)
-      i = 13
-
-      # starting from highest ranks, look for straight
-      while i >= 5:
-        no_gaps = True
-        for j in range(i, i - 5, -1):
-          if rank_counts[j] == 0:
-            no_gaps = False
-            i = j - 1
-            break
-        if no_gaps:
-          cards = set()
-          for k in range(i - 4, i + 1):
-            cards.add([card for card in hand if card.rank == k][0])
-          return (hands.STRAIGHT, cards)
-      return (hands.STRAIGHT, None)
-    
-    def three_kind(hand):
-      rank_counts, _ = get_counts(hand)
-      ranks = sorted([rank for rank, count in rank_counts.most_common() if count == 3])
-      if len(ranks) > 0:
-        cards = set([card for card in hand if card.rank == ranks[-1]])
-        return (hands.THREE_KIND, cards)
-      return (hands.THREE_KIND, None)
-
-    def two_pair(hand):
-      rank_counts, _ = get_counts(hand)
-      ranks = sorted([rank for rank, count in rank_counts.most_common() if count == 2])
-      if len(ranks) >= 2:
-        cards = set([card for card in hand if card.rank == ranks[-1] or card.rank == ranks[-2]])
-        return (hands.TWO_PAIR, cards)
-      return (hands.TWO_PAIR, None)
-
-    def pair(hand):
-      rank_counts, _ = get_counts(hand)
-      ranks = sorted([rank for rank, count in rank_counts.most_common() if count == 2])
-      if len(ranks) == 1:
-        cards = set([card for card in hand if card.rank == ranks[-1]])
-        return (hands.ONE_PAIR, cards)
-      return (hands.ONE_PAIR, None)
-
-    def high_card(hand):
-      rank_counts, _ = get_counts(hand)
-      ranks = sorted([rank for rank, count in rank_counts.most_common() if count == 1])
-      if len(ranks) > 0:
-        cards = set([card for card in hand if card.rank == ranks[-1]])
-        return (hands.HIGH_CARD, cards)
-      return (hands.HIGH_CARD, None)
-
-    def straight_flush(hand):
-      _, suit_counts = get_counts(hand)
-      suits = [suit for suit, count in suit_counts.most_common() if count >= 5]
-
-      straights = []
-      for suit in suits:
-        _, cards = straight(set([card for card in hand if card.suit == suit]))
-        if cards != None:
-          straights.append(cards)
-
-      # off all available straights, choose highest
-      if len(straights) > 0:
-        best_straight = straights[0]
-        for curr_straight in straights[1:]:
-          if HandScoring.compare_hands(curr_straight, best_straight):
-            best_straight = curr_straight
-        return (hands.STRAIGHT_FLUSH, best_straight)
-      return (hands.STRAIGHT_FLUSH, None)
-
-    hand_test_funcs = [
-      straight_flush,
-      four_kind,
-      fullhouse,
-      flush,
-      straight,
-      three_kind,
-      two_pair,
-      pair,
-      high_card
-    ]
-
-    for func in hand_test_funcs:
-      hand_rank, cards = func(hand)
-      if cards != None:
-        return (hand_rank, cards)
-    return None
-  
   def compare_hands(hand1, hand2):
     '''
     Return which hand beats the other
     '''
-
-    hand_rank1, cards1 = HandScoring.score(hand1)
-    hand_rank2, cards2 = HandScoring.score(hand2)
-
-    if hand_rank1.value > hand_rank2.value:
-      return -1
-    elif hand_rank1.value < hand_rank2.value:
-      return 1
-    else:
-
-      # both have the same hand, compare by ranks
-      if hand_rank1 == HandScoring.HandRanks.FULL_HOUSE:
-        # rank of 3 pair is most significant
-        rank_counts_1 = Counter([card.rank for card in cards1])
-        rank_counts_2 = Counter([card.rank for card in cards2])
-
-        if rank_counts_1.most_common(1)[0].rank < rank_counts_2.most_common(1)[0].rank:
-          return -1
-        elif rank_counts_1.most_common(1)[0].rank > rank_counts_2.most_common(1)[0].rank:
-          return 1
-        else:
-          raise 'More than 4 of 1 rank in deck'
-
-      # compare top cards by rank, continue down until mismatch is found
-      else:
-        for card1, card2 in zip(sorted(cards1, reverse=True), sorted(cards2, reverse=True)):
-          if card1.rank < card2.rank:
-            return -1
-          elif card1.rank > card2.rank:
-            return 1
-      
-      # cards in hand are equal ranks
-      return 0
-
+    strength1 = HandScoring.strength(hand1)
+    strength2 = HandScoring.strength(hand2)
+    return (strength1 > strength2) - (strength1 < strength2)
 
   
 @total_ordering
@@ -294,6 +259,8 @@ class Card:
   def __init__(self, rank, suit):
     self.rank = rank
     self.suit = suit
+    self.code = (suit - 1) * 13 + rank - 1 # bit in card masks
+    self.bit = 1 << self.code
   
   def __repr__(self):
     return Card.ranks[self.rank] + Card.suits[self.suit]
@@ -318,15 +285,98 @@ class Card:
     
 
 class Deck:
-  def __init__(self):
-    self.cards = deque([Card(rank, suit) for rank in Card.ranks.keys() for suit in Card.suits.keys()])
+  def __init__(self, cards=None, rng=random):
+    '''
+    Shuffled deck of the given cards (all 52 by default), using the
+    shuffle of rng
+    '''
+    if cards is None:
+      cards = Bitboard.CARDS # cards are immutable, so share them
+    self.cards = deque(cards)
+    self.rng = rng
     self.shuffle()
 
   def shuffle(self):
-    random.shuffle(self.cards)
+    self.rng.shuffle(self.cards)
 
   def draw(self, num=1):
     if num == 1:
       return self.cards.pop()
     else:
       return [self.cards.pop() for _ in range(num)]
+
+
+class Bitboard:
+  '''
+  52-bit card masks. Card (rank, suit) is bit (suit - 1) * 13 + rank - 1,
+  so each suit is a contiguous 13-bit mask of ranks.
+  '''
+  RANK_MASK = (1 << 13) - 1
+  FULL_DECK = (1 << 52) - 1
+  SUIT_SPREAD = 1 | 1 << 13 | 1 << 26 | 1 << 39 # one bit of each suit, shift by rank
+
+  def popcount(mask):
+    return bin(mask).count('1')
+
+  def straight_ranks(top):
+    '''
+    Rank mask of the straight ending at rank top
+    '''
+    return 0x1F << (top - 5)
+
+  def straight_top(ranks):
+    '''
+    Highest rank ending 5 consecutive ranks in a rank mask, or 0
+    '''
+    for top in range(13, 4, -1):
+      straight = 0x1F << (top - 5)
+      if ranks & straight == straight:
+        return top
+    return 0
+
+  def top5(ranks):
+    '''
+    Highest 5 ranks of a rank mask
+    '''
+    while bin(ranks).count('1') > 5:
+      ranks &= ranks - 1
+    return ranks
+
+  def rank_key(ranks):
+    '''
+    Ranks of a rank mask as 4-bit digits, highest rank most significant
+    '''
+    key = 0
+    for rank in range(13, 0, -1):
+      if ranks >> (rank - 1) & 1:
+        key = key << 4 | rank
+    return key
+
+  # lookup tables over every 13-bit rank mask
+  POPCOUNT = list(map(popcount, range(1 << 13)))
+  STRAIGHTS = list(map(straight_top, range(1 << 13)))
+  TOP5 = list(map(top5, range(1 << 13)))
+  RANK_KEYS = list(map(rank_key, range(1 << 13)))
+
+  CARDS = [Card(code % 13 + 1, code // 13 + 1) for code in range(52)]
+
+  def mask(cards):
+    '''
+    Card mask of an iterable of cards
+    '''
+    mask = 0
+    for card in cards:
+      mask |= card.bit
+    return mask
+
+  def cards(mask):
+    '''
+    Set of cards in a card mask
+    '''
+    all_cards = Bitboard.CARDS
+    cards = set()
+    while mask:
+      low = mask & -mask
+      cards.add(all_cards[low.bit_length() - 1])
+      mask ^= low
+    return cards
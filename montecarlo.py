@@ -0,0 +1,132 @@
+from model import Deck, Bitboard
+from engine import Engine
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import math
+import os
+import random
+import time
+
+'''
+Monte Carlo estimate of the chance to win with a filter
+'''
+
+Estimate = namedtuple('Estimate', [
+  'probability', # fraction of games won
+  'half_width', # half width of the confidence interval
+  'wins',
+  'games',
+  'seconds', # wall clock time
+  'games_per_core_second' # throughput of a single worker
+])
+
+
+def simulate(player_cards, dealer_cards, remaining, filter, games, seed, policy=None):
+  '''
+  Play games from a state with the remaining cards shuffled, starting
+  with the given filter. Later rounds use policy(model), or keep the same
+  filter if no policy is given. Return (wins, games, seconds).
+  '''
+  rng = random.Random(seed)
+  start = time.perf_counter()
+  wins = 0
+  for _ in range(games):
+    engine = Engine(Engine.new_model(Deck(remaining, rng), player_cards, dealer_cards))
+
+    def choose_filter(model):
+      if policy is None or engine.rounds == 0:
+        return filter
+      return policy(model)
+
+    if engine.play(choose_filter) == Engine.Outcome.WIN:
+      wins += 1
+  return wins, games, time.perf_counter() - start
+
+
+def chunk_seed(seed, chunk):
+  '''
+  Seed for one chunk of games. String seeds are hashed, so every chunk
+  gets an independent stream that only depends on (seed, chunk).
+  '''
+  return str(seed) + ':' + str(chunk)
+
+
+def wilson_half_width(wins, games, z):
+  '''
+  Half width of the Wilson score interval for a win fraction
+  '''
+  p = wins / games
+  return z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / (1 + z * z / games)
+
+
+def estimate(player_cards, dealer_cards, remaining, filter, target=0.01, z=1.96,
+    chunk_size=2000, max_games=1000000, workers=None, seed=0, policy=None):
+  '''
+  Estimate the chance to win from a state with the given filter. Chunks
+  of games run across a pool of worker processes and are combined in
+  submission order, so a seed always gives the same result. Stops once
+  the confidence interval (z standard errors) is narrower than
+  target on each side, or after max_games.
+  '''
+  if workers is None:
+    workers = os.cpu_count() or 1
+  args = (list(player_cards), list(dealer_cards), list(remaining), set(filter))
+  start = time.perf_counter()
+  wins = games = 0
+  worker_seconds = 0.0
+  chunks = math.ceil(max_games / chunk_size)
+
+  def done():
+    return games >= max_games or games > 0 and wilson_half_width(wins, games, z) <= target
+
+  if workers == 1:
+    for chunk in range(chunks):
+      chunk_wins, chunk_games, seconds = simulate(*args, chunk_size, chunk_seed(seed, chunk), policy)
+      wins, games, worker_seconds = wins + chunk_wins, games + chunk_games, worker_seconds + seconds
+      if done():
+        break
+  else:
+    with ProcessPoolExecutor(workers) as pool:
+      # keep every worker busy, reading results in the order submitted
+      pending = []
+      next_chunk = 0
+      while not done() and (pending or next_chunk < chunks):
+        while len(pending) < 2 * workers and next_chunk < chunks:
+          pending.append(pool.submit(simulate, *args, chunk_size, chunk_seed(seed, next_chunk), policy))
+          next_chunk += 1
+        chunk_wins, chunk_games, seconds = pending.pop(0).result()
+        wins, games, worker_seconds = wins + chunk_wins, games + chunk_games, worker_seconds + seconds
+      for future in pending:
+        future.cancel()
+
+  return Estimate(
+    probability=wins / games,
+    half_width=wilson_half_width(wins, games, z),
+    wins=wins,
+    games=games,
+    seconds=time.perf_counter() - start,
+    games_per_core_second=games / worker_seconds
+  )
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Estimate the chance to win from the start of a game')
+  parser.add_argument('--suits', default='4', help='suits to filter, e.g. 14 for hearts and spades')
+  parser.add_argument('--ranks', default='', help='ranks to filter, e.g. 12,13 for kings and aces')
+  parser.add_argument('--target', type=float, default=0.005)
+  parser.add_argument('--workers', type=int, default=None)
+  parser.add_argument('--seed', type=int, default=0)
+  args = parser.parse_args()
+
+  suits = set(int(suit) for suit in args.suits)
+  ranks = set(int(rank) for rank in args.ranks.split(',') if rank)
+  filter = set(card for card in Bitboard.CARDS if card.suit in suits or card.rank in ranks)
+  result = estimate([], [], Bitboard.CARDS, filter, target=args.target, workers=args.workers, seed=args.seed)
+  print('win probability %.4f +- %.4f (%d games, %.1fs, %d games/sec per core)' % (
+    result.probability, result.half_width, result.games, result.seconds, result.games_per_core_second))
+
+
+if __name__ == '__main__':
+  main()
@@ -1,5 +1,6 @@
 from model import Model, SelectionItem, Card, Deck, Hand, HandScoring
 from view import View
+from engine import Engine
 
 import readchar
 import sys
@@ -46,73 +47,25 @@ class Controller:
     self.model.player_hand = Hand()
     self.model.dealer_hand = Hand()
     self.model.drawn_cards = []
+    self.engine = Engine(self.model)
 
   def run_game(self):
     '''
     Alternate between choosing filter and drawing cards until game ends
     '''
-
-    while True:
-      # get card filter
-      self.get_selection()
+    while self.engine.outcome is None:
+      self.engine.start_round(self.get_selection())
 
       # start drawing
-      self.model.state = self.model.GameMode.DRAWING
+      self.model.cursor = [0,0] # move cursor off board
       self.render()
-
-      done = False
-      self.model.drawn_cards = []
-      self.model.cursor=[0,0] # move cursor off board
-      while not done:
-
-        # draw card
-        card = self.model.deck.draw()
-        self.model.drawn_cards.append(card)
-
-        # give it to player or dealer
-        if card in self.model.filter:
-          self.model.player_hand.add_card(card)
-          done = True # player got card, stop drawing
-        else:
-          self.model.dealer_hand.add_card(card)
-
-        # update view
+      for _ in self.engine.draws():
         self.render()
+        time.sleep(0.8) # delay until next draw
 
-        # if out of cards
-        if len(self.model.deck.cards) == 0:
-          done = True
-
-        # delay until next draw
-        time.sleep(0.8)
-
-      # check if game over
-      if self.model.player_hand.size() >= 5:
-
-        # draw until dealer has at least 8 cards
-        if self.model.dealer_hand.size() < 8:
-          self.model.state = self.model.GameMode.FINISHING
-          while self.model.dealer_hand.size() < 8:
-            card = self.model.deck.draw()
-            self.model.drawn_cards.append(card)
-            self.model.dealer_hand.add_card(card)
-            self.render()
-            time.sleep(0.8)
-
-        # check winner
-        won = HandScoring.compare_hands(self.model.player_hand.hand, self.model.dealer_hand.hand) == 1
-        self.model.message = 'YOU WIN' if won else 'YOU LOSE'
-        self.render()
-        sys.exit(0)
-
-      # alternate end condition: player got less than 5 cards from entire deck
-      if len(self.model.deck.cards) == 0:
-
-        # player loses by default
-        self.model.message = 'YOU LOSE'
-        self.render()
-        sys.exit(0)
-
+    # show game over message
+    self.render()
+    sys.exit(0)
 
   def render(self):
     '''
@@ -172,8 +125,7 @@ class Controller:
             if card_item.is_selected:
               selected_cards.add(card_item.card)
         if len(selected_cards) > 0:
-          model.filter = selected_cards
-          break
+          return selected_cards
 
       # escape sequences
       elif keypress in (readchar.key.CR, readchar.key.CTRL_C):
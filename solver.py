@@ -0,0 +1,235 @@
+from model import Bitboard, HandScoring
+import montecarlo
+
+from collections import OrderedDict, namedtuple
+from itertools import combinations
+import math
+import random
+import time
+
+'''
+Exact expectimax search for the filter that maximizes the chance to win
+'''
+
+Solution = namedtuple('Solution', [
+  'filter', # card mask to filter to the player
+  'probability', # chance to win with that filter
+  'exact' # False if the search ran out of time and fell back to sampling
+])
+
+
+class OutOfTime(Exception):
+  pass
+
+
+def suit_blocks(mask):
+  return [(mask >> shift) & Bitboard.RANK_MASK for shift in (0, 13, 26, 39)]
+
+
+def from_blocks(blocks):
+  return blocks[0] | blocks[1] << 13 | blocks[2] << 26 | blocks[3] << 39
+
+
+def canonical(player, dealer, remaining):
+  '''
+  Sort the suits of a state by their (player, dealer, remaining) rank
+  masks. States that only differ by a permutation of suits get the same
+  key. Return the key and, for each suit of the key, the original suit.
+  '''
+  suits = sorted(zip(suit_blocks(player), suit_blocks(dealer), suit_blocks(remaining), range(4)), reverse=True)
+  key = tuple(from_blocks([suit[i] for suit in suits]) for i in range(3))
+  return key, [suit[3] for suit in suits]
+
+
+def unpermute(mask, order):
+  '''
+  Mask in the original suits of a state, from a mask in its canonical suits
+  '''
+  blocks = suit_blocks(mask)
+  original = [0] * 4
+  for i, suit in enumerate(order):
+    original[suit] = blocks[i]
+  return from_blocks(original)
+
+
+def cards_of(mask):
+  '''
+  Single-card masks of a card mask
+  '''
+  bits = []
+  while mask:
+    low = mask & -mask
+    bits.append(low)
+    mask ^= low
+  return bits
+
+
+class Solver:
+  '''
+  Expectimax over draws. Each round the player picks a filter (max node)
+  and the draw deals a random run of non-filter cards to the dealer and
+  one filter card to the player (chance node). Values are cached in a
+  transposition table of canonical states with LRU eviction.
+  '''
+  def __init__(self, table_size=1 << 20):
+    self.table_size = table_size
+    self.table = OrderedDict() # canonical state -> (probability, canonical filter)
+    self.deadline = None
+    self.nodes = 0
+
+  def solve(self, player, dealer, remaining, budget=None):
+    '''
+    Best filter for a state given as card masks. With a budget in seconds,
+    a search that doesn't finish in half of it falls back to sampling the
+    structured filters (whole ranks or suits) for the rest.
+    '''
+    start = time.perf_counter()
+    self.deadline = None if budget is None else start + budget / 2
+    try:
+      probability, filter = self.best(player, dealer, remaining)
+      return Solution(filter, probability, True)
+    except OutOfTime:
+      return self.sample(player, dealer, remaining, start + budget)
+    finally:
+      self.deadline = None
+
+  def best(self, player, dealer, remaining):
+    '''
+    Win probability and best filter (0 if there is no choice to make)
+    '''
+    key, order = canonical(player, dealer, remaining)
+    entry = self.lookup(key)
+    if entry is None:
+      entry = self.search(*key)
+      self.store(key, entry)
+    probability, filter = entry
+    return probability, unpermute(filter, order)
+
+  def lookup(self, key):
+    entry = self.table.get(key)
+    if entry is not None:
+      self.table.move_to_end(key)
+    return entry
+
+  def store(self, key, entry):
+    self.table[key] = entry
+    if len(self.table) > self.table_size:
+      self.table.popitem(last=False)
+
+  def search(self, player, dealer, remaining):
+    '''
+    Value of a canonical state
+    '''
+    self.tick()
+    if Bitboard.popcount(player) >= 5:
+      return (self.final(player, dealer, remaining), 0)
+    if remaining == 0:
+      return (0.0, 0)
+
+    best_probability = -1.0
+    best_filter = 0
+    for filter in self.filters(player, dealer, remaining):
+      probability = self.expect(player, dealer, remaining, filter, best_probability)
+      if probability is not None and probability > best_probability:
+        best_probability, best_filter = probability, filter
+        if best_probability == 1.0:
+          break
+    return (best_probability, best_filter)
+
+  def tick(self):
+    '''
+    Count a node, checking the deadline every so often
+    '''
+    self.nodes += 1
+    if self.deadline is not None and self.nodes % 256 == 0 and time.perf_counter() > self.deadline:
+      raise OutOfTime()
+
+  def filters(self, player, dealer, remaining):
+    '''
+    Nonempty filters of the remaining cards, one per class of filters that
+    only differ by swapping suits the state can't tell apart
+    '''
+    blocks = list(zip(suit_blocks(player), suit_blocks(dealer), suit_blocks(remaining)))
+    twins = [i for i in range(1, 4) if blocks[i] == blocks[i - 1]]
+
+    filter = remaining
+    while filter:
+      filter_blocks = suit_blocks(filter)
+      if all(filter_blocks[i - 1] >= filter_blocks[i] for i in twins):
+        yield filter
+      filter = (filter - 1) & remaining
+
+  def expect(self, player, dealer, remaining, filter, bound):
+    '''
+    Win probability with a filter, or None once it provably can't beat
+    bound: every outcome still to be added is worth at most 1.
+    '''
+    n = Bitboard.popcount(remaining)
+    others = remaining & ~filter
+    hits = cards_of(filter)
+
+    # chance that a given run of k other cards comes before a given hit
+    chance = [math.factorial(k) * math.factorial(n - k - 1) / math.factorial(n) for k in range(n)]
+
+    total = 0.0
+    unexplored = 1.0
+    run = others
+    while True:
+      k = Bitboard.popcount(run)
+      new_dealer = dealer | run
+      left = remaining & ~run
+      for hit in hits:
+        total += chance[k] * self.best(player | hit, new_dealer, left & ~hit)[0]
+      unexplored -= chance[k] * len(hits)
+      if total + unexplored <= bound:
+        return None
+      if run == 0:
+        break
+      run = (run - 1) & others
+    return total
+
+  def final(self, player, dealer, remaining):
+    '''
+    Chance to win once the player has 5 cards and the dealer is filled up
+    to 8 from the remaining cards
+    '''
+    player_strength = HandScoring.strength_mask(player)
+    need = min(8 - Bitboard.popcount(dealer), Bitboard.popcount(remaining))
+    if need <= 0:
+      return 1.0 if player_strength > HandScoring.strength_mask(dealer) else 0.0
+
+    wins = total = 0
+    for cards in combinations(cards_of(remaining), need):
+      self.tick()
+      total += 1
+      if player_strength > HandScoring.strength_mask(dealer | sum(cards)):
+        wins += 1
+    return wins / total
+
+  def sample(self, player, dealer, remaining, deadline):
+    '''
+    Best structured filter by Monte Carlo, sampling until the deadline
+    '''
+    candidates = []
+    for rank in range(13):
+      candidates.append(remaining & (1 << rank) * Bitboard.SUIT_SPREAD)
+    for shift in (0, 13, 26, 39):
+      candidates.append(remaining & Bitboard.RANK_MASK << shift)
+    candidates = [filter for filter in set(candidates) if filter]
+
+    player_cards = Bitboard.cards(player)
+    dealer_cards = Bitboard.cards(dealer)
+    remaining_cards = list(Bitboard.cards(remaining))
+    wins = dict.fromkeys(candidates, 0)
+    games = dict.fromkeys(candidates, 0)
+    rng = random.Random(0)
+    while True:
+      for filter in candidates:
+        chunk_wins, chunk_games, _ = montecarlo.simulate(
+          player_cards, dealer_cards, remaining_cards, Bitboard.cards(filter), 20, rng.random())
+        wins[filter] += chunk_wins
+        games[filter] += chunk_games
+      if time.perf_counter() > deadline:
+        break
+    filter = max(candidates, key=lambda filter: wins[filter] / games[filter])
+    return Solution(filter, wins[filter] / games[filter], False)
@@ -0,0 +1,45 @@
+from model import Card, HandScoring, Bitboard
+import batch
+
+import numpy as np
+import random
+
+'''
+Run with pytest
+'''
+
+def random_masks(rng, count):
+  return [Bitboard.mask(rng.sample(Bitboard.CARDS, rng.randint(0, 52))) for _ in range(count)]
+
+def test_strength_batch():
+  rng = random.Random(3)
+  masks = random_masks(rng, 5000)
+  expected = [HandScoring.strength_mask(mask) if mask else 0 for mask in masks]
+  assert batch.strength_batch(np.array(masks, dtype=np.uint64)).tolist() == expected
+
+def test_small_hands():
+  rng = random.Random(4)
+  masks = [Bitboard.mask(rng.sample(Bitboard.CARDS, rng.randint(1, 9))) for _ in range(5000)]
+  masks.append(Bitboard.mask([Card(rank, 2) for rank in range(4, 9)]))
+  categories, strengths = batch.score_batch(masks)
+  assert strengths.tolist() == [HandScoring.strength_mask(mask) for mask in masks]
+  assert categories.tolist() == [HandScoring.score_mask(mask)[0].value for mask in masks]
+  assert set(categories.tolist()) == set(range(1, 10))
+
+def test_matrix_input():
+  rng = random.Random(5)
+  masks = np.array(random_masks(rng, 100), dtype=np.uint64)
+  matrix = batch.to_matrix(masks)
+  assert matrix.shape == (100, 52)
+  assert (batch.to_masks(matrix) == masks).all()
+  assert (batch.strength_batch(matrix) == batch.strength_batch(masks)).all()
+
+def test_compare_batch():
+  rng = random.Random(6)
+  players = [set(rng.sample(Bitboard.CARDS, 5)) for _ in range(1000)]
+  dealers = [set(rng.sample(Bitboard.CARDS, 8)) for _ in range(1000)]
+  results = batch.compare_batch(
+    [Bitboard.mask(hand) for hand in players],
+    [Bitboard.mask(hand) for hand in dealers]
+  )
+  assert results.tolist() == [HandScoring.compare_hands(p, d) for p, d in zip(players, dealers)]
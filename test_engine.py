@@ -0,0 +1,44 @@
+from model import Card, HandScoring, Bitboard
+from engine import Engine
+
+import random
+
+'''
+Run with pytest
+'''
+
+def available(model, cards):
+  return set(card for card in cards if model.card_available(card))
+
+def test_play():
+  random.seed(7)
+  spades = set(card for card in Bitboard.CARDS if card.suit == 4)
+  for _ in range(200):
+    engine = Engine()
+    outcome = engine.play(lambda model: available(model, spades))
+    model = engine.model
+    assert model.player_hand.size() == 5
+    assert model.dealer_hand.size() >= 8
+    assert engine.rounds == 5
+    won = HandScoring.compare_hands(model.player_hand.hand, model.dealer_hand.hand) == 1
+    assert outcome == (Engine.Outcome.WIN if won else Engine.Outcome.LOSE)
+    assert model.player_hand.hand <= spades
+    assert len(model.deck.cards) + model.player_hand.size() + model.dealer_hand.size() == 52
+
+def test_deck_empty():
+  random.seed(8)
+  aces = set(card for card in Bitboard.CARDS if card.rank == 13)
+  engine = Engine()
+  assert engine.play(lambda model: available(model, aces)) == Engine.Outcome.DECK_EMPTY
+  assert engine.model.player_hand.hand == aces
+  assert len(engine.model.deck.cards) == 0
+  assert engine.model.message == 'YOU LOSE'
+
+def test_draws():
+  engine = Engine()
+  engine.model.deck.cards.remove(Card(1, 1))
+  engine.model.deck.cards.append(Card(1, 1)) # next card drawn
+  engine.start_round(set([Card(1, 1)]))
+  assert list(engine.draws()) == [Card(1, 1)]
+  assert engine.model.player_hand.hand == set([Card(1, 1)])
+  assert engine.outcome is None
@@ -1,4 +1,6 @@
-from model import Card, HandScoring, Deck
+from model import Card, HandScoring, Deck, Bitboard
+from collections import Counter
+import random
 
 '''
 Run with pytest
@@ -6,6 +8,173 @@ Run with pytest
 
 hands = HandScoring.HandRanks
 
+def legacy_score(hand):
+  '''
+  The original closure-chain evaluator, kept as the reference for the
+  bitboard evaluator
+  '''
+  if len(hand) == 0:
+    return None
+
+  hands = HandScoring.HandRanks
+
+  def get_counts(hand):
+    '''
+    Get number of each rank and suit in the hand
+    '''
+    rank_counts = Counter([card.rank for card in hand])
+    suit_counts = Counter([card.suit for card in hand])
+    return rank_counts, suit_counts    
+
+  '''
+  Each of these detects the specified hand in some subset of the cards
+  '''
+
+  def four_kind(hand):
+    rank_counts, _ = get_counts(hand)
+    ranks = sorted([rank for rank, count in rank_counts.most_common() if count == 4])
+    if len(ranks) > 0:
+      # choose best available 4 of kind by rank
+      cards = set([card for card in hand if card.rank == ranks[-1]])
+      return (hands.FOUR_KIND, cards)
+    return (hands.FOUR_KIND, None)
+
+  def fullhouse(hand):
+    rank_counts, _ = get_counts(hand)
+    ranks_3 = sorted([rank for rank, count in rank_counts.most_common() if count == 3])
+    ranks_2 = sorted([rank for rank, count in rank_counts.most_common() if count == 2 or count == 3])
+
+    if len(ranks_3) > 0:
+      # choose best rank for 3-of-kind
+      best_rank_3 = ranks_3[-1]
+      ranks_2.remove(best_rank_3)
+
+      # choose best remaining rank for pair
+      if len(ranks_2) > 0:
+        best_rank_2 = ranks_2[-1]
+        cards = set([card for card in hand if card.rank == best_rank_3])
+        for card in hand:
+          if card.rank == best_rank_2:
+            cards.add(card)
+            if len(cards) == 5:
+              break
+        return (hands.FULL_HOUSE, cards)
+
+    return (hands.FULL_HOUSE, None)
+
+  def flush(hand):
+    _, suit_counts = get_counts(hand)
+    suits = [suit for suit, count in suit_counts.most_common() if count >= 5]
+    if len(suits) > 0:
+      all_flush_cards = sorted([card for card in hand if card.suit in suits])
+
+      # choose best ranked flush
+      top_ranked_suit = all_flush_cards[-1].suit
+      cards = sorted([card for card in all_flush_cards if card.suit == top_ranked_suit], reverse=True)[:5]
+      return (hands.FLUSH, set(cards))
+    return (hands.FLUSH, None)
+
+  def straight(hand):
+    rank_counts, _ = get_counts(hand)
+    i = 13
+
+    # starting from highest ranks, look for straight
+    while i >= 5:
+      no_gaps = True
+      for j in range(i, i - 5, -1):
+        if rank_counts[j] == 0:
+          no_gaps = False
+          i = j - 1
+          break
+      if no_gaps:
+        cards = set()
+        for k in range(i - 4, i + 1):
+          cards.add([card for card in hand if card.rank == k][0])
+        return (hands.STRAIGHT, cards)
+    return (hands.STRAIGHT, None)
+  
+  def three_kind(hand):
+    rank_counts, _ = get_counts(hand)
+    ranks = sorted([rank for rank, count in rank_counts.most_common() if count == 3])
+    if len(ranks) > 0:
+      cards = set([card for card in hand if card.rank == ranks[-1]])
+      return (hands.THREE_KIND, cards)
+    return (hands.THREE_KIND, None)
+
+  def two_pair(hand):
+    rank_counts, _ = get_counts(hand)
+    ranks = sorted([rank for rank, count in rank_counts.most_common() if count == 2])
+    if len(ranks) >= 2:
+      cards = set([card for card in hand if card.rank == ranks[-1] or card.rank == ranks[-2]])
+      return (hands.TWO_PAIR, cards)
+    return (hands.TWO_PAIR, None)
+
+  def pair(hand):
+    rank_counts, _ = get_counts(hand)
+    ranks = sorted([rank for rank, count in rank_counts.most_common() if count == 2])
+    if len(ranks) == 1:
+      cards = set([card for card in hand if card.rank == ranks[-1]])
+      return (hands.ONE_PAIR, cards)
+    return (hands.ONE_PAIR, None)
+
+  def high_card(hand):
+    rank_counts, _ = get_counts(hand)
+    ranks = sorted([rank for rank, count in rank_counts.most_common() if count == 1])
+    if len(ranks) > 0:
+      cards = set([card for card in hand if card.rank == ranks[-1]])
+      return (hands.HIGH_CARD, cards)
+    return (hands.HIGH_CARD, None)
+
+  def straight_flush(hand):
+    _, suit_counts = get_counts(hand)
+    suits = [suit for suit, count in suit_counts.most_common() if count >= 5]
+
+    straights = []
+    for suit in suits:
+      _, cards = straight(set([card for card in hand if card.suit == suit]))
+      if cards != None:
+        straights.append(cards)
+
+    # off all available straights, choose highest
+    if len(straights) > 0:
+      best_straight = straights[0]
+      for curr_straight in straights[1:]:
+        if legacy_compare(curr_straight, best_straight):
+          best_straight = curr_straight
+      return (hands.STRAIGHT_FLUSH, best_straight)
+    return (hands.STRAIGHT_FLUSH, None)
+
+  hand_test_funcs = [
+    straight_flush,
+    four_kind,
+    fullhouse,
+    flush,
+    straight,
+    three_kind,
+    two_pair,
+    pair,
+    high_card
+  ]
+
+  for func in hand_test_funcs:
+    hand_rank, cards = func(hand)
+    if cards != None:
+      return (hand_rank, cards)
+  return None
+
+def legacy_compare(hand1, hand2):
+  '''
+  Tie-break of the original compare_hands, for the reference evaluator
+  '''
+  _, cards1 = legacy_score(hand1)
+  _, cards2 = legacy_score(hand2)
+  for card1, card2 in zip(sorted(cards1, reverse=True), sorted(cards2, reverse=True)):
+    if card1.rank < card2.rank:
+      return -1
+    elif card1.rank > card2.rank:
+      return 1
+  return 0
+
 def test_deck():
   d = Deck()
   assert len(d.cards) == 52
@@ -116,4 +285,76 @@ def test_compare():
     set([
       Card(10,2)
     ])
-  ) == 0
\ No newline at end of file
+  ) == 0
+
+def ranks_of(cards):
+  return sorted(card.rank for card in cards)
+
+def test_bitboard_roundtrip():
+  cards = set(Card(rank, suit) for rank in range(1, 14) for suit in range(1, 5))
+  assert Bitboard.mask(cards) == Bitboard.FULL_DECK
+  assert Bitboard.cards(Bitboard.FULL_DECK) == cards
+  assert Bitboard.mask([Card(1, 1)]) == 1
+  assert Bitboard.mask([Card(13, 4)]) == 1 << 51
+
+def test_bitboard_matches_legacy():
+  rng = random.Random(1)
+  deck = list(Bitboard.cards(Bitboard.FULL_DECK))
+  for size in range(1, 53):
+    for _ in range(20):
+      hand = set(rng.sample(deck, size))
+      hand_rank, cards = HandScoring.score(hand)
+      legacy_rank, legacy_cards = legacy_score(hand)
+      assert hand_rank == legacy_rank
+      assert cards <= hand
+
+      # suits of straights and full-house pairs depend on set order in the
+      # reference, and so does the choice between several straight flushes
+      if hand_rank == hands.STRAIGHT_FLUSH:
+        suit_counts = Counter(card.suit for card in hand)
+        straights = [suit for suit in suit_counts if legacy_score(set(card for card in hand if card.suit == suit))[0] == hands.STRAIGHT_FLUSH]
+        if len(straights) == 1:
+          assert cards == legacy_cards
+      elif hand_rank in (hands.STRAIGHT, hands.FULL_HOUSE):
+        assert ranks_of(cards) == ranks_of(legacy_cards)
+      else:
+        assert cards == legacy_cards
+
+def test_score_mask():
+  assert HandScoring.score_mask(0) == None
+  hand = set([Card(1,1), Card(1,2), Card(2,3), Card(2,4)])
+  assert HandScoring.score_mask(Bitboard.mask(hand)) == (hands.TWO_PAIR, hand)
+
+def test_strength_matches_legacy_compare():
+  rng = random.Random(2)
+  deck = list(Bitboard.cards(Bitboard.FULL_DECK))
+  for _ in range(2000):
+    hand1 = set(rng.sample(deck, rng.randint(1, 9)))
+    hand2 = set(rng.sample(deck, rng.randint(1, 9)))
+    rank1, rank2 = legacy_score(hand1)[0], legacy_score(hand2)[0]
+    if rank1 != rank2:
+      expected = 1 if rank1.value < rank2.value else -1
+    elif rank1 == hands.FULL_HOUSE:
+      continue
+    else:
+      expected = legacy_compare(hand1, hand2)
+    assert HandScoring.compare_hands(hand1, hand2) == expected
+
+def test_compare_fullhouse():
+  assert HandScoring.compare_hands(
+    set([Card(2,1), Card(2,2), Card(2,3), Card(13,1), Card(13,2)]),
+    set([Card(3,1), Card(3,2), Card(3,3), Card(4,1), Card(4,2)])
+  ) == -1
+
+  assert HandScoring.compare_hands(
+    set([Card(5,1), Card(5,2), Card(5,3), Card(13,1), Card(13,2)]),
+    set([Card(5,4), Card(5,2), Card(5,3), Card(12,1), Card(12,2)])
+  ) == 1
+
+def test_strength():
+  assert HandScoring.strength(set()) == 0
+  pair = HandScoring.strength(set([Card(10,1), Card(10,2)]))
+  assert HandScoring.hand_rank(pair) == hands.ONE_PAIR
+  assert pair == HandScoring.strength(set([Card(10,3), Card(10,4), Card(3,1)]))
+  assert pair < HandScoring.strength(set([Card(11,1), Card(11,2)]))
+  assert pair > HandScoring.strength(set([Card(13,1), Card(12,1)]))
@@ -0,0 +1,34 @@
+from model import Card, Bitboard
+import montecarlo
+
+'''
+Run with pytest
+'''
+
+spades = set(card for card in Bitboard.CARDS if card.suit == 4)
+
+def test_reproducible():
+  first = montecarlo.estimate([], [], Bitboard.CARDS, spades, target=0.05, chunk_size=200, workers=1, seed=1)
+  second = montecarlo.estimate([], [], Bitboard.CARDS, spades, target=0.05, chunk_size=200, workers=1, seed=1)
+  pooled = montecarlo.estimate([], [], Bitboard.CARDS, spades, target=0.05, chunk_size=200, workers=2, seed=1)
+  assert first.wins == second.wins == pooled.wins
+  assert first.games == second.games == pooled.games
+  assert first.half_width <= 0.05
+  assert first.games_per_core_second > 0
+
+def test_stops_at_max_games():
+  result = montecarlo.estimate([], [], Bitboard.CARDS, spades, target=0, chunk_size=100, max_games=300, workers=1)
+  assert result.games == 300
+
+def test_deck_empty_loses():
+  # 4 cards cannot make a hand of 5
+  aces = set(card for card in Bitboard.CARDS if card.rank == 13)
+  result = montecarlo.estimate([], [], Bitboard.CARDS, aces, target=0.1, chunk_size=50, workers=1)
+  assert result.probability == 0
+
+def test_continues_from_state():
+  # a royal flush beats whatever the dealer gets from low hearts
+  player = [Card(rank, 4) for rank in range(10, 14)]
+  remaining = [Card(9, 4)] + [Card(rank, 1) for rank in range(1, 11)]
+  result = montecarlo.estimate(player, [], remaining, [Card(9, 4)], target=0.1, chunk_size=50, workers=1)
+  assert result.probability == 1
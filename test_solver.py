@@ -0,0 +1,65 @@
+from model import Card, Deck, Bitboard
+from engine import Engine
+import solver
+
+from collections import deque
+from itertools import permutations
+
+'''
+Run with pytest
+'''
+
+player = [Card(1,1), Card(2,1), Card(3,1), Card(4,1)]
+dealer = [Card(9,2), Card(9,3), Card(9,4)]
+remaining = [Card(5,1), Card(13,1), Card(4,4), Card(8,2), Card(12,3)]
+
+def win_rate(filter):
+  '''
+  Play every order of the remaining cards through the engine
+  '''
+  wins = games = 0
+  for order in permutations(remaining):
+    deck = Deck(remaining)
+    deck.cards = deque(reversed(order)) # drawn from the right
+    engine = Engine(Engine.new_model(deck, player, dealer))
+    if engine.play(lambda model: filter) == Engine.Outcome.WIN:
+      wins += 1
+    games += 1
+  return wins / games
+
+def test_matches_engine():
+  solution = solver.Solver().solve(Bitboard.mask(player), Bitboard.mask(dealer), Bitboard.mask(remaining))
+  assert solution.exact
+  best = max(
+    win_rate(Bitboard.cards(filter)) for filter in range(1, 1 << len(remaining))
+    for filter in [Bitboard.mask(card for i, card in enumerate(remaining) if filter >> i & 1)]
+  )
+  assert abs(solution.probability - best) < 1e-9
+  assert abs(win_rate(Bitboard.cards(solution.filter)) - best) < 1e-9
+
+def swap_suits(cards):
+  return [Card(card.rank, {1: 3, 3: 1}.get(card.suit, card.suit)) for card in cards]
+
+def test_suit_symmetry():
+  search = solver.Solver()
+  masks = [Bitboard.mask(cards) for cards in (player, dealer, remaining)]
+  swapped = [Bitboard.mask(swap_suits(cards)) for cards in (player, dealer, remaining)]
+  solution = search.solve(*masks)
+  assert len(search.table) > 0
+  entries = len(search.table)
+  nodes = search.nodes
+  other = search.solve(*swapped)
+  assert search.nodes == nodes and len(search.table) == entries
+  assert other.probability == solution.probability
+  assert other.filter == Bitboard.mask(swap_suits(Bitboard.cards(solution.filter)))
+
+def test_table_size():
+  search = solver.Solver(table_size=3)
+  search.solve(*[Bitboard.mask(cards) for cards in (player[:3], dealer, remaining)])
+  assert len(search.table) == 3
+
+def test_budget():
+  solution = solver.Solver().solve(0, 0, Bitboard.FULL_DECK, budget=0.5)
+  assert not solution.exact
+  assert solution.filter & ~Bitboard.FULL_DECK == 0
+  assert 0 <= solution.probability <= 1